@@ -72,7 +72,7 @@ export function FocusUnitDetailSection({ focusUnit }: FocusUnitDetailSectionProp
     
     // Count spikes in each bin across all segments
     data.segments.forEach(segment => {
-      segment.spike_times.forEach(spikeTime => {
+      (segment.spike_times ?? []).forEach(spikeTime => {
         const binIdx = Math.floor(spikeTime / binSizeSec);
         if (binIdx >= 0 && binIdx < numBins) {
           firingRates[binIdx] += 1;
@@ -92,7 +92,7 @@ export function FocusUnitDetailSection({ focusUnit }: FocusUnitDetailSectionProp
     // Collect all spike times across all segments
     const allSpikeTimes: number[] = [];
     data.segments.forEach(segment => {
-      allSpikeTimes.push(...segment.spike_times);
+      allSpikeTimes.push(...(segment.spike_times ?? []));
     });
     
     // Sort spike times
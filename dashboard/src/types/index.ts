@@ -95,13 +95,16 @@ export interface SpikeTrainSegment {
   start_time_offset: number;
   end_time_offset: number;
   num_spikes: number;
-  spike_times: number[];
+  spike_times?: number[];
+  // Present instead of spike_times when bin_width_sec > 0: base64-encoded little-endian uint16 counts
+  spike_counts?: string | null;
   is_focus_unit: boolean;
   is_gap?: boolean;
 }
 
 export interface SpikeTrainResponse {
   focus_unit_id: string;
+  bin_width_sec?: number;
   total_spikes: number;
   total_duration_sec: number;
   segments: SpikeTrainSegment[];
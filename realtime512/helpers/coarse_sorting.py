@@ -2,6 +2,8 @@ import numpy as np
 from sklearn.neighbors import NearestNeighbors
 import sklearn.cluster
 
+from .data_utils import compute_label_index
+
 def find_nearest_neighbors(data: np.ndarray, *, num_neighbors: int):
     """
     Find nearest neighbors for each data point.
@@ -212,9 +214,11 @@ def compute_coarse_sorting(
     
     # Compute cluster templates
     templates = np.zeros((num_clusters_found, num_channels), dtype=np.float32)
+    label_index = compute_label_index(labels)
+    no_spikes = np.array([], dtype=np.intp)
     for k in range(1, num_clusters_found + 1):
         # Should we use mean or median here?
-        templates[k - 1, :] = np.median(frames[labels == k, :], axis=0)
+        templates[k - 1, :] = np.median(frames[label_index.get(k, no_spikes), :], axis=0)
     
     # Sort templates by peak channel x-coordinate
     template_x_coords = compute_template_peak_channel_x_coordinate(templates, np.array(electrode_coords))
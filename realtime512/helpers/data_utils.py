@@ -38,3 +38,31 @@ def set_high_activity_to_zero(*, data, sampling_frequency_hz, high_activity_inte
             relative_end = seg_end_frame_clipped - start_frame
             data_copy[relative_start:relative_end, :] = 0
     return data_copy
+
+
+def compute_label_index(labels):
+    """
+    Group the indices of a label array by label value.
+    
+    Uses a single stable sort instead of one boolean scan per label.
+    
+    Parameters
+    ----------
+    labels : np.ndarray
+        1D array of integer labels
+    
+    Returns
+    -------
+    dict
+        Mapping from label (int) to a sorted array of the indices where it occurs
+    """
+    labels = np.asarray(labels)
+    order = np.argsort(labels, kind="stable")
+    sorted_labels = labels[order]
+    unique_labels = np.unique(sorted_labels)
+    starts = np.searchsorted(sorted_labels, unique_labels, side="left")
+    ends = np.searchsorted(sorted_labels, unique_labels, side="right")
+    return {
+        int(label): order[start:end]
+        for label, start, end in zip(unique_labels, starts, ends)
+    }
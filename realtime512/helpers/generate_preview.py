@@ -12,6 +12,7 @@ from ..figpack_realtime512.MEAFiringRatesAndAmplitudes import MEAFiringRatesAndA
 from ..figpack_realtime512.TemplatesView import TemplatesView
 from ..figpack_realtime512.ClusterSeparationView import ClusterSeparationView, ClusterSeparationViewItem
 from .coarse_sorting import find_nearest_neighbors
+from .data_utils import compute_label_index
 
 
 def generate_preview(
@@ -198,6 +199,10 @@ def create_cluster_separation_view(
     print(f'Finding {num_neighbors} nearest neighbors for each unit in template space...')
     neighbor_indices = find_nearest_neighbors(templates, num_neighbors=num_neighbors + 1)
     
+    # Spike indices of each unit, computed once rather than per pair
+    label_index = compute_label_index(spike_labels)
+    no_spikes = np.array([], dtype=np.intp)
+    
     # Build separation items for each unit and its neighbors
     # Track processed pairs to avoid redundancy
     processed_pairs = set()
@@ -219,8 +224,8 @@ def create_cluster_separation_view(
             processed_pairs.add(pair_key)
             
             # Get spike indices for both units
-            spike_inds_1 = np.where(spike_labels == unit_id)[0]
-            spike_inds_2 = np.where(spike_labels == neighbor_id)[0]
+            spike_inds_1 = label_index.get(int(unit_id), no_spikes)
+            spike_inds_2 = label_index.get(int(neighbor_id), no_spikes)
             
             if len(spike_inds_1) < 2 or len(spike_inds_2) < 2:
                 continue
@@ -275,9 +280,11 @@ def create_autocorrelograms_view(
 ):
     """Create a view with autocorrelograms for each unit."""
     num_units = np.max(spike_labels)
+    label_index = compute_label_index(spike_labels)
+    no_spikes = np.array([], dtype=np.intp)
     autocorrelograms = []
     for unit_id in range(1, num_units + 1):
-        spike_train_sec = spike_times[spike_labels == unit_id]
+        spike_train_sec = spike_times[label_index.get(unit_id, no_spikes)]
         if len(spike_train_sec) < 2:
             continue
         bin_edges_sec, bin_counts = compute_unit_autocorrelogram(
@@ -1,14 +1,24 @@
 """Helper functions for matching units between different recordings."""
 
+import os
+import json
+import mmap
 import numpy as np
 import hashlib
-from sklearn.neighbors import NearestNeighbors
+from scipy.spatial import cKDTree
+
+
+# Cache of spike_labels hashes keyed by path, holding (mtime_ns, size, hash)
+_spike_labels_hash_cache = {}
 
 
 def calculate_spike_labels_hash(spike_labels_path):
     """
     Calculate SHA-1 hash of spike_labels.npy file.
     
+    The hash is cached in memory and only recomputed when the file's
+    modification time or size changes.
+    
     Parameters
     ----------
     spike_labels_path : str
@@ -19,20 +29,167 @@ def calculate_spike_labels_hash(spike_labels_path):
     str or None
         SHA-1 hash hexdigest, or None if file doesn't exist
     """
-    import os
-    
-    if not os.path.exists(spike_labels_path):
+    try:
+        st = os.stat(spike_labels_path)
+    except FileNotFoundError:
         return None
     
-    sha1 = hashlib.sha1()
+    cached = _spike_labels_hash_cache.get(spike_labels_path)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    
     with open(spike_labels_path, "rb") as f:
-        while chunk := f.read(8192):
-            sha1.update(chunk)
+        if hasattr(hashlib, "file_digest"):
+            # Python >= 3.11: hashed in C without a Python-level read loop
+            digest = hashlib.file_digest(f, "sha1").hexdigest()
+        else:
+            sha1 = hashlib.sha1()
+            if os.fstat(f.fileno()).st_size > 0:
+                # mmap cannot map an empty file
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    sha1.update(mm)
+            digest = sha1.hexdigest()
+    
+    _spike_labels_hash_cache[spike_labels_path] = (st.st_mtime_ns, st.st_size, digest)
+    return digest
+
+
+def _read_mutual_matches(unit_matching_dir, fname_x, fname_y):
+    """Read the mutual matches for one pair, or an empty list if unavailable."""
+    mutual_matches_path = os.path.join(unit_matching_dir, fname_x, fname_y, "mutual_matches.json")
+    if not os.path.exists(mutual_matches_path):
+        return []
+    try:
+        with open(mutual_matches_path, "r") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError):
+        # Skip files that can't be read
+        return []
+
+
+def _add_pair_to_index(index, fname_x, fname_y, matches):
+    """Record the mutual matches of one pair in the index, in both directions."""
+    def add_match(fname_a, unit_a, fname_b, unit_b, overall_score):
+        unit_matches = index.setdefault(fname_a, {}).setdefault(str(unit_a), [])
+        # The same match might be found from both directions
+        for m in unit_matches:
+            if m["bin_filename"] == fname_b and m["unit_id"] == unit_b:
+                return
+        unit_matches.append({
+            "bin_filename": fname_b,
+            "unit_id": unit_b,
+            "overall_score": overall_score
+        })
+    
+    for match in matches:
+        unit_x = match.get("unit_x")
+        unit_y = match.get("unit_y")
+        overall_score = match.get("overall_score")
+        add_match(fname_x, unit_x, fname_y, unit_y, overall_score)
+        add_match(fname_y, unit_y, fname_x, unit_x, overall_score)
+
+
+def build_mutual_matches_index(unit_matching_dir):
+    """
+    Collect all mutual matches into a lookup keyed by file and unit.
+    
+    Scans unit_matching_dir/{filename_x}/{filename_y}/mutual_matches.json and
+    records each match in both directions.
+    
+    Parameters
+    ----------
+    unit_matching_dir : str
+        Path to the computed/unit_matching directory
+    
+    Returns
+    -------
+    dict
+        Nested dict index[bin_filename][str(unit_id)] -> list of dicts with
+        'bin_filename', 'unit_id' and 'overall_score' of the matched units
+    """
+    index = {}
+    
+    if not os.path.exists(unit_matching_dir):
+        return index
+    
+    for fname_x in sorted(os.listdir(unit_matching_dir)):
+        x_dir = os.path.join(unit_matching_dir, fname_x)
+        if not os.path.isdir(x_dir):
+            continue
+        for fname_y in sorted(os.listdir(x_dir)):
+            matches = _read_mutual_matches(unit_matching_dir, fname_x, fname_y)
+            _add_pair_to_index(index, fname_x, fname_y, matches)
+    
+    return index
+
+
+def _save_mutual_matches_index(unit_matching_dir, index):
+    """Write unit_matching_dir/index.json atomically."""
+    os.makedirs(unit_matching_dir, exist_ok=True)
+    index_path = os.path.join(unit_matching_dir, "index.json")
+    # Replace atomically since the server may be reading the index concurrently
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path)
+
+
+def write_mutual_matches_index(unit_matching_dir):
+    """
+    Rebuild unit_matching_dir/index.json from all mutual_matches.json files.
+    
+    Parameters
+    ----------
+    unit_matching_dir : str
+        Path to the computed/unit_matching directory
+    """
+    _save_mutual_matches_index(unit_matching_dir, build_mutual_matches_index(unit_matching_dir))
+
+
+def update_mutual_matches_index(unit_matching_dir, fname_x, fname_y):
+    """
+    Update unit_matching_dir/index.json after the results of one pair changed.
+    
+    Only the mutual_matches.json files of the pair (and of the reverse pair,
+    whose entries are indistinguishable in the index) are read. Falls back to
+    a full rebuild if the index does not exist yet.
+    
+    Parameters
+    ----------
+    unit_matching_dir : str
+        Path to the computed/unit_matching directory
+    fname_x : str
+        Filename X of the pair whose results changed
+    fname_y : str
+        Filename Y of the pair whose results changed
+    """
+    index_path = os.path.join(unit_matching_dir, "index.json")
+    try:
+        with open(index_path, "r") as f:
+            index = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        write_mutual_matches_index(unit_matching_dir)
+        return
+    
+    # Drop all entries linking the two files
+    for fname_a, fname_b in ((fname_x, fname_y), (fname_y, fname_x)):
+        units = index.get(fname_a, {})
+        for unit_key in list(units.keys()):
+            units[unit_key] = [m for m in units[unit_key] if m["bin_filename"] != fname_b]
+            if len(units[unit_key]) == 0:
+                del units[unit_key]
+        if fname_a in index and len(units) == 0:
+            del index[fname_a]
     
-    return sha1.hexdigest()
+    # Re-add them from the current results of the pair and its reverse
+    for fname_a, fname_b in ((fname_x, fname_y), (fname_y, fname_x)):
+        matches = _read_mutual_matches(unit_matching_dir, fname_a, fname_b)
+        _add_pair_to_index(index, fname_a, fname_b, matches)
+    
+    _save_mutual_matches_index(unit_matching_dir, index)
 
 
-def nearest_neighbors(data1: np.ndarray, data2: np.ndarray, *, n_neighbors: int):
+def nearest_neighbors(data1: np.ndarray, data2: np.ndarray, *, n_neighbors: int, approximate: bool = False, n_trees=None):
     """
     For each point in data2, find the nearest neighbors in data1.
     
@@ -44,18 +201,337 @@ def nearest_neighbors(data1: np.ndarray, data2: np.ndarray, *, n_neighbors: int)
         Query data array of shape (num_points_2, num_features)
     n_neighbors : int
         Number of nearest neighbors to find
+    approximate : bool
+        If True, use approximate nearest neighbors from pynndescent (default: False)
+    n_trees : int or None
+        Number of random projection trees for the approximate search; more trees
+        give better accuracy at the cost of speed (default: None, pynndescent's default)
+    
+    Returns
+    -------
+    np.ndarray
+        Array of shape (num_points_2, n_neighbors) with indices into data1
+    """
+    if n_neighbors > len(data1):
+        # Some backends (e.g. FAISS) would silently pad the result with invalid indices
+        raise ValueError(
+            f"Expected n_neighbors <= n_samples, but n_samples = {len(data1)}, n_neighbors = {n_neighbors}"
+        )
+    if approximate:
+        return _approximate_nearest_neighbors(data1, data2, n_neighbors=n_neighbors, n_trees=n_trees)
+    if data1.shape[1] > 15:
+        # Tree methods degrade in high dimensions, where brute force is faster
+        indices = _gpu_nearest_neighbors(data1, data2, n_neighbors=n_neighbors)
+        if indices is not None:
+            return indices
+        return _brute_force_nearest_neighbors(data1, data2, n_neighbors=n_neighbors)
+    tree = cKDTree(data1)
+    distances, indices = tree.query(data2, k=n_neighbors, workers=-1)
+    # query drops the neighbor axis when k == 1
+    return indices.reshape(len(data2), n_neighbors)
+
+
+def cached_nearest_neighbors(data1: np.ndarray, data2: np.ndarray, *, n_neighbors: int, cache_dir: str, approximate: bool = False, n_trees=None, max_cache_bytes: int = 2 * 1024 ** 3):
+    """
+    Same as nearest_neighbors, but results are cached on disk.
+    
+    The cache key is a BLAKE2b hash of the contents of both arrays, so the
+    neighbor indices are only recomputed when the spike frames change. Each
+    entry takes num_points_2 * n_neighbors * 4 bytes. When the cache grows
+    beyond max_cache_bytes, the least recently used entries are deleted, so
+    entries orphaned by re-sorted files eventually go away.
+    
+    Parameters
+    ----------
+    data1 : np.ndarray
+        Reference data array of shape (num_points_1, num_features)
+    data2 : np.ndarray
+        Query data array of shape (num_points_2, num_features)
+    n_neighbors : int
+        Number of nearest neighbors to find
+    cache_dir : str
+        Directory where cached neighbor indices are stored
+    approximate : bool
+        If True, use approximate nearest neighbors (default: False)
+    n_trees : int or None
+        Number of trees for the approximate search (default: None)
+    max_cache_bytes : int
+        Maximum total size of the cache directory (default: 2 GiB)
+    
+    Returns
+    -------
+    np.ndarray
+        Array of shape (num_points_2, n_neighbors) with indices into data1
+    """
+    h = hashlib.blake2b(digest_size=20)
+    for data in (data1, data2):
+        data = np.ascontiguousarray(data)
+        h.update(f"{data.dtype.str}{data.shape}".encode())
+        h.update(data)
+    cache_name = f"{h.hexdigest()}_k{n_neighbors}"
+    if approximate:
+        # Approximate results must never be returned for exact queries
+        cache_name += f"_approx_t{n_trees}"
+    cache_path = os.path.join(cache_dir, cache_name + ".npy")
+    
+    if os.path.exists(cache_path):
+        # Mark as recently used so that it is pruned last
+        os.utime(cache_path)
+        return np.load(cache_path)
+    
+    indices = nearest_neighbors(
+        data1, data2, n_neighbors=n_neighbors, approximate=approximate, n_trees=n_trees
+    ).astype(np.int32)
+    
+    # Write to a temporary file first so an interrupted write never leaves a corrupt cache entry
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, indices)
+    os.replace(tmp_path, cache_path)
+    _prune_knn_cache(cache_dir, max_cache_bytes)
+    return indices
+
+
+def _prune_knn_cache(cache_dir, max_cache_bytes):
+    """Delete the least recently used cache entries until the cache fits in max_cache_bytes."""
+    entries = []
+    for fname in os.listdir(cache_dir):
+        if not fname.endswith(".npy"):
+            continue
+        st = os.stat(os.path.join(cache_dir, fname))
+        entries.append((st.st_mtime_ns, st.st_size, fname))
+    total_bytes = sum(size for _, size, _ in entries)
+    for _, size, fname in sorted(entries):
+        if total_bytes <= max_cache_bytes:
+            break
+        os.remove(os.path.join(cache_dir, fname))
+        total_bytes -= size
+
+
+def _approximate_nearest_neighbors(data1: np.ndarray, data2: np.ndarray, *, n_neighbors: int, n_trees=None):
+    """
+    Approximate nearest neighbors using pynndescent.
+    
+    pynndescent is an optional dependency that must be installed to use this.
+    
+    Parameters
+    ----------
+    data1 : np.ndarray
+        Reference data array of shape (num_points_1, num_features)
+    data2 : np.ndarray
+        Query data array of shape (num_points_2, num_features)
+    n_neighbors : int
+        Number of nearest neighbors to find
+    n_trees : int or None
+        Number of random projection trees used to initialize the search graph
     
     Returns
     -------
     np.ndarray
         Array of shape (num_points_2, n_neighbors) with indices into data1
     """
-    nbrs = NearestNeighbors(n_neighbors=n_neighbors, algorithm='auto').fit(data1)
-    distances, indices = nbrs.kneighbors(data2)
+    try:
+        from pynndescent import NNDescent
+    except ImportError:
+        raise ImportError(
+            "Approximate nearest neighbors require pynndescent. "
+            "Install it with 'pip install pynndescent'."
+        )
+    index = NNDescent(data1, metric="euclidean", n_trees=n_trees)
+    indices, distances = index.query(data2, k=n_neighbors)
     return indices
 
 
-def compute_unit_matches(frames_x, labels_x, frames_y, labels_y, n_neighbors=10):
+def _gpu_nearest_neighbors(data1: np.ndarray, data2: np.ndarray, *, n_neighbors: int):
+    """
+    Exact euclidean nearest neighbors on the GPU using FAISS, if available.
+    
+    FAISS is an optional dependency (e.g. the faiss-gpu package). It is only
+    used when it is installed and at least one GPU is visible.
+    
+    Parameters
+    ----------
+    data1 : np.ndarray
+        Reference data array of shape (num_points_1, num_features)
+    data2 : np.ndarray
+        Query data array of shape (num_points_2, num_features)
+    n_neighbors : int
+        Number of nearest neighbors to find
+    
+    Returns
+    -------
+    np.ndarray or None
+        Array of shape (num_points_2, n_neighbors) with indices into data1,
+        or None if no GPU is available
+    """
+    try:
+        import faiss
+    except ImportError:
+        return None
+    if not hasattr(faiss, "get_num_gpus") or faiss.get_num_gpus() == 0:
+        return None
+    
+    data1 = np.ascontiguousarray(data1, dtype=np.float32)
+    data2 = np.ascontiguousarray(data2, dtype=np.float32)
+    index = faiss.index_cpu_to_all_gpus(faiss.IndexFlatL2(data1.shape[1]))
+    index.add(data1)
+    distances, indices = index.search(data2, n_neighbors)
+    return indices
+
+
+def _brute_force_nearest_neighbors(data1: np.ndarray, data2: np.ndarray, *, n_neighbors: int):
+    """
+    Brute-force euclidean nearest neighbors using matrix products.
+    
+    The queries are processed in chunks so that the distance matrix for a
+    chunk stays within a bounded amount of memory.
+    
+    Parameters
+    ----------
+    data1 : np.ndarray
+        Reference data array of shape (num_points_1, num_features)
+    data2 : np.ndarray
+        Query data array of shape (num_points_2, num_features)
+    n_neighbors : int
+        Number of nearest neighbors to find
+    
+    Returns
+    -------
+    np.ndarray
+        Array of shape (num_points_2, n_neighbors) with indices into data1,
+        ordered from nearest to farthest
+    """
+    data1 = np.ascontiguousarray(data1, dtype=np.float32)
+    data2 = np.ascontiguousarray(data2, dtype=np.float32)
+    num_points_1 = data1.shape[0]
+    num_points_2 = data2.shape[0]
+    norms1 = np.sum(data1 ** 2, axis=1)
+    
+    # Keep each chunk's distance matrix at around 2**24 float32 values (64 MB)
+    chunk_size = max(1, (2 ** 24) // max(num_points_1, 1))
+    
+    indices = np.zeros((num_points_2, n_neighbors), dtype=np.int64)
+    for i1 in range(0, num_points_2, chunk_size):
+        i2 = min(i1 + chunk_size, num_points_2)
+        # Squared distances, omitting the |data2|^2 term which is constant per row
+        dists = norms1[None, :] - 2 * np.dot(data2[i1:i2], data1.T)
+        if n_neighbors < num_points_1:
+            candidates = np.argpartition(dists, n_neighbors - 1, axis=1)[:, :n_neighbors]
+        else:
+            candidates = np.tile(np.arange(num_points_1), (i2 - i1, 1))
+        order = np.argsort(np.take_along_axis(dists, candidates, axis=1), axis=1)
+        indices[i1:i2] = np.take_along_axis(candidates, order, axis=1)
+    return indices
+
+
+def _majority_vote_labels(neighbor_labels: np.ndarray):
+    """
+    Find the most frequent label in each row of neighbor labels.
+    
+    Ties are broken in favor of the smallest label.
+    
+    Parameters
+    ----------
+    neighbor_labels : np.ndarray
+        Array of shape (num_points, n_neighbors) with the labels of each point's neighbors
+    
+    Returns
+    -------
+    np.ndarray
+        Array of shape (num_points,) with the majority label for each point
+    """
+    sorted_labels = np.sort(neighbor_labels, axis=1)
+    num_points, n_neighbors = sorted_labels.shape
+    # Equal labels are now contiguous within each row; number the runs of equal labels
+    new_run = np.ones(sorted_labels.shape, dtype=bool)
+    new_run[:, 1:] = sorted_labels[:, 1:] != sorted_labels[:, :-1]
+    run_ids = np.cumsum(new_run, axis=1) - 1
+    # Length of each run, counted in a single pass over all rows
+    flat_run_ids = (np.arange(num_points)[:, None] * n_neighbors + run_ids).ravel()
+    run_lengths = np.bincount(flat_run_ids, minlength=num_points * n_neighbors).reshape(num_points, n_neighbors)
+    # argmax returns the first longest run, which has the smallest label since rows are sorted
+    best_runs = np.argmax(run_lengths, axis=1)
+    best_inds = np.argmax(run_ids == best_runs[:, None], axis=1)
+    return sorted_labels[np.arange(num_points), best_inds].astype(np.int32)
+
+
+def _cluster_majority_vote(labels_self, event_matches, max_label_self, max_label_other):
+    """
+    For each unit, find the matched label that occurs most often among its spikes.
+    
+    Parameters
+    ----------
+    labels_self : np.ndarray
+        Unit labels of the spikes, shape (num_spikes,)
+    event_matches : np.ndarray
+        Matched label in the other dataset for each spike, shape (num_spikes,)
+    max_label_self : int
+        Maximum unit label in labels_self
+    max_label_other : int
+        Maximum unit label in the other dataset
+    
+    Returns
+    -------
+    best_matches : np.ndarray
+        Array of shape (max_label_self + 1,) with the best matching label for each unit
+    match_scores : np.ndarray
+        Array of shape (max_label_self + 1,) with the fraction of spikes voting for the best match
+    """
+    # votes[k, j] = number of spikes of unit k whose event match is j
+    num_other = max_label_other + 1
+    votes = np.bincount(
+        labels_self.astype(np.int64) * num_other + event_matches,
+        minlength=(max_label_self + 1) * num_other
+    ).reshape(max_label_self + 1, num_other)
+    
+    num_spikes = votes.sum(axis=1)
+    best_matches = np.argmax(votes, axis=1).astype(np.int32)
+    match_scores = np.zeros(max_label_self + 1, dtype=np.float32)
+    has_spikes = num_spikes > 0
+    match_scores[has_spikes] = votes[has_spikes].max(axis=1) / num_spikes[has_spikes]
+    
+    # Label 0 is not a unit, and units without spikes have no match
+    best_matches[0] = 0
+    match_scores[0] = 0
+    best_matches[~has_spikes] = 0
+    return best_matches, match_scores
+
+
+def _match_direction(nearest, labels_self, labels_other, max_label_self, max_label_other):
+    """
+    Match the spikes and units of one dataset to the units of the other.
+    
+    Parameters
+    ----------
+    nearest : np.ndarray
+        Nearest neighbors in the other dataset for each spike, shape (num_spikes, n_neighbors)
+    labels_self : np.ndarray
+        Unit labels of the spikes, shape (num_spikes,)
+    labels_other : np.ndarray
+        Unit labels of the other dataset
+    max_label_self : int
+        Maximum unit label in labels_self
+    max_label_other : int
+        Maximum unit label in labels_other
+    
+    Returns
+    -------
+    best_matches : np.ndarray
+        Array of shape (max_label_self + 1,) with the best matching label for each unit
+    match_scores : np.ndarray
+        Array of shape (max_label_self + 1,) with the fraction of spikes voting for the best match
+    event_matches : np.ndarray
+        Array of shape (num_spikes,) with the majority label among each spike's neighbors
+    """
+    event_matches = _majority_vote_labels(labels_other[nearest])
+    best_matches, match_scores = _cluster_majority_vote(
+        labels_self, event_matches, max_label_self, max_label_other
+    )
+    return best_matches, match_scores, event_matches
+
+
+def compute_unit_matches(frames_x, labels_x, frames_y, labels_y, n_neighbors=10, knn_cache_dir=None, approximate=False, n_trees=None):
     """
     Compute unit matches between two datasets using nearest neighbor matching.
     
@@ -73,6 +549,13 @@ def compute_unit_matches(frames_x, labels_x, frames_y, labels_y, n_neighbors=10)
         Unit labels for dataset Y, shape (num_spikes_y,)
     n_neighbors : int
         Number of nearest neighbors to use (default: 10)
+    knn_cache_dir : str or None
+        If given, nearest neighbor results are cached in this directory (default: None)
+    approximate : bool
+        If True, use approximate nearest neighbors, which is faster for large
+        datasets and gives nearly identical majority votes (default: False)
+    n_trees : int or None
+        Number of trees for the approximate search; trades speed for accuracy (default: None)
         
     Returns
     -------
@@ -83,58 +566,23 @@ def compute_unit_matches(frames_x, labels_x, frames_y, labels_y, n_neighbors=10)
         - 'event_matches_y_to_x': np.ndarray of shape (num_spikes_y,) with matched unit IDs from X
     """
     # Find nearest neighbors in both directions
-    nearest_y_to_x = nearest_neighbors(frames_x, frames_y, n_neighbors=n_neighbors)
-    nearest_x_to_y = nearest_neighbors(frames_y, frames_x, n_neighbors=n_neighbors)
-    
-    # Compute best matches from Y to X
-    max_label_y = int(np.max(labels_y))
-    best_matches_y_to_x = np.zeros(max_label_y + 1, dtype=np.int32)
-    match_scores_y_to_x = np.zeros(max_label_y + 1, dtype=np.float32)
+    knn_kwargs = dict(n_neighbors=n_neighbors, approximate=approximate, n_trees=n_trees)
+    if knn_cache_dir is not None:
+        nearest_y_to_x = cached_nearest_neighbors(frames_x, frames_y, cache_dir=knn_cache_dir, **knn_kwargs)
+        nearest_x_to_y = cached_nearest_neighbors(frames_y, frames_x, cache_dir=knn_cache_dir, **knn_kwargs)
+    else:
+        nearest_y_to_x = nearest_neighbors(frames_x, frames_y, **knn_kwargs)
+        nearest_x_to_y = nearest_neighbors(frames_y, frames_x, **knn_kwargs)
     
-    for ky in range(1, max_label_y + 1):
-        inds_y = np.where(labels_y == ky)[0]
-        if len(inds_y) == 0:
-            continue
-            
-        cluster_matches = []
-        for i in range(len(inds_y)):
-            ind_y = inds_y[i]
-            neighbors = nearest_y_to_x[ind_y]
-            neighbor_labels = labels_x[neighbors]
-            unique, counts = np.unique(neighbor_labels, return_counts=True)
-            best_label = unique[np.argmax(counts)]
-            cluster_matches.append(best_label)
-        
-        best_label = max(cluster_matches, key=cluster_matches.count)
-        best_label_count = cluster_matches.count(best_label)
-        match_score = best_label_count / len(inds_y)
-        best_matches_y_to_x[ky] = best_label
-        match_scores_y_to_x[ky] = match_score
-    
-    # Compute best matches from X to Y
+    # Match each dataset against the other
     max_label_x = int(np.max(labels_x))
-    best_matches_x_to_y = np.zeros(max_label_x + 1, dtype=np.int32)
-    match_scores_x_to_y = np.zeros(max_label_x + 1, dtype=np.float32)
-    
-    for kx in range(1, max_label_x + 1):
-        inds_x = np.where(labels_x == kx)[0]
-        if len(inds_x) == 0:
-            continue
-            
-        cluster_matches = []
-        for i in range(len(inds_x)):
-            ind_x = inds_x[i]
-            neighbors = nearest_x_to_y[ind_x]
-            neighbor_labels = labels_y[neighbors]
-            unique, counts = np.unique(neighbor_labels, return_counts=True)
-            best_label = unique[np.argmax(counts)]
-            cluster_matches.append(best_label)
-        
-        best_label = max(cluster_matches, key=cluster_matches.count)
-        best_label_count = cluster_matches.count(best_label)
-        match_score = best_label_count / len(inds_x)
-        best_matches_x_to_y[kx] = best_label
-        match_scores_x_to_y[kx] = match_score
+    max_label_y = int(np.max(labels_y))
+    best_matches_y_to_x, match_scores_y_to_x, event_matches_y_to_x = _match_direction(
+        nearest_y_to_x, labels_y, labels_x, max_label_y, max_label_x
+    )
+    best_matches_x_to_y, match_scores_x_to_y, event_matches_x_to_y = _match_direction(
+        nearest_x_to_y, labels_x, labels_y, max_label_x, max_label_y
+    )
     
     # Find mutual matches
     mutual_matches = []
@@ -154,23 +602,6 @@ def compute_unit_matches(frames_x, labels_x, frames_y, labels_y, n_neighbors=10)
                 'overall_score': overall_score
             })
     
-    # Create event-level matches for all spikes
-    event_matches_x_to_y = np.zeros(len(labels_x), dtype=np.int32)
-    for i in range(len(labels_x)):
-        neighbors = nearest_x_to_y[i]
-        neighbor_labels = labels_y[neighbors]
-        unique, counts = np.unique(neighbor_labels, return_counts=True)
-        best_label = unique[np.argmax(counts)]
-        event_matches_x_to_y[i] = best_label
-    
-    event_matches_y_to_x = np.zeros(len(labels_y), dtype=np.int32)
-    for i in range(len(labels_y)):
-        neighbors = nearest_y_to_x[i]
-        neighbor_labels = labels_x[neighbors]
-        unique, counts = np.unique(neighbor_labels, return_counts=True)
-        best_label = unique[np.argmax(counts)]
-        event_matches_y_to_x[i] = best_label
-    
     return {
         'mutual_matches': mutual_matches,
         'event_matches_x_to_y': event_matches_x_to_y,
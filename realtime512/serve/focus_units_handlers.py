@@ -1,30 +1,55 @@
 """Handlers for focus units management."""
 
 import os
+import base64
+import copy
 import json
-import hashlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import orjson
 import yaml
-from flask import jsonify, request
+from flask import jsonify, request, Response
+
+from ..helpers.unit_matching import calculate_spike_labels_hash
+
+# Upper bound on the total number of spike count bins in one spike train response
+MAX_SPIKE_COUNT_BINS = 10_000_000
+
+def _json_response(data):
+    """Serialize data (which may contain numpy arrays) to a JSON response using orjson."""
+    return Response(
+        orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY),
+        mimetype="application/json"
+    )
 
 def _get_focus_units_path():
     """Get path to focus_units.json file."""
     return os.path.join(os.getcwd(), "focus_units.json")
 
+@functools.lru_cache(maxsize=1)
+def _read_focus_units(focus_units_path, mtime_ns, size):
+    """Parse focus_units.json. Cached until the file's mtime or size changes."""
+    with open(focus_units_path, "r") as f:
+        return json.load(f)
+
 def _load_focus_units():
     """Load focus units from JSON file."""
     focus_units_path = _get_focus_units_path()
     
-    if not os.path.exists(focus_units_path):
+    try:
+        st = os.stat(focus_units_path)
+    except FileNotFoundError:
         return {"focus_units": []}
     
     try:
-        with open(focus_units_path, "r") as f:
-            data = json.load(f)
-        return data
+        data = _read_focus_units(focus_units_path, st.st_mtime_ns, st.st_size)
     except json.JSONDecodeError:
         # If file is corrupted, return empty structure
         return {"focus_units": []}
+    
+    # Handlers modify the returned data, so don't hand out the cached object
+    return copy.deepcopy(data)
 
 def _save_focus_units(data):
     """Save focus units to JSON file."""
@@ -32,6 +57,19 @@ def _save_focus_units(data):
     
     with open(focus_units_path, "w") as f:
         json.dump(data, f, indent=2)
+    # A rewrite within the mtime granularity could leave (mtime_ns, size) unchanged
+    _read_focus_units.cache_clear()
+
+@functools.lru_cache(maxsize=1)
+def _read_config(config_path, mtime_ns, size):
+    """Parse the configuration file. Cached until the file's mtime or size changes."""
+    with open(config_path, "r") as f:
+        return yaml.safe_load(f)
+
+def _load_config(config_path):
+    """Load the realtime512.yaml configuration."""
+    st = os.stat(config_path)
+    return _read_config(config_path, st.st_mtime_ns, st.st_size)
 
 def _calculate_spike_labels_hash(filename):
     """Calculate SHA-1 hash of spike_labels.npy file."""
@@ -40,16 +78,7 @@ def _calculate_spike_labels_hash(filename):
         computed_dir, "coarse_sorting", filename, "spike_labels.npy"
     )
     
-    if not os.path.exists(spike_labels_path):
-        return None
-    
-    # Calculate SHA-1 hash of the file
-    sha1 = hashlib.sha1()
-    with open(spike_labels_path, "rb") as f:
-        while chunk := f.read(8192):
-            sha1.update(chunk)
-    
-    return sha1.hexdigest()
+    return calculate_spike_labels_hash(spike_labels_path)
 
 def _get_next_focus_unit_id(existing_units):
     """Generate next focus unit ID based on existing units."""
@@ -71,82 +100,119 @@ def _get_next_focus_unit_id(existing_units):
     next_num = max_num + 1
     return f"F{next_num:03d}"
 
-def get_focus_units_handler():
-    """Get all focus units with mutual match information."""
-    data = _load_focus_units()
-    
-    # Enrich each focus unit with mutual match data
+@functools.lru_cache(maxsize=1)
+def _read_mutual_matches_index(index_path, mtime_ns):
+    """Read the mutual matches index. Cached until the file's mtime changes."""
+    with open(index_path, "r") as f:
+        return json.load(f)
+
+def _load_mutual_matches_index():
+    """Load computed/unit_matching/index.json, or None if it is not available."""
+    index_path = os.path.join(os.getcwd(), "computed", "unit_matching", "index.json")
+    try:
+        mtime_ns = os.stat(index_path).st_mtime_ns
+        return _read_mutual_matches_index(index_path, mtime_ns)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def _scan_mutual_matches(bin_filename, unit_id):
+    """Find mutual matches for a unit by scanning the unit_matching directory."""
     computed_dir = os.path.join(os.getcwd(), "computed")
     unit_matching_dir = os.path.join(computed_dir, "unit_matching")
-    
-    for focus_unit in data["focus_units"]:
-        bin_filename = focus_unit["bin_filename"]
-        unit_id = focus_unit["unit_id"]
-        mutual_matches = []
-        
-        # Only proceed if unit_matching directory exists
-        if not os.path.exists(unit_matching_dir):
-            focus_unit["mutual_matches"] = mutual_matches
+    mutual_matches = []
+    # The same match might be found from both directions, so track what has been added
+    seen = set()
+    
+    # Only proceed if unit_matching directory exists
+    if not os.path.exists(unit_matching_dir):
+        return mutual_matches
+    
+    # Only pairs involving our file can contain our unit: unit_matching/{bin_filename}/{fname_y}
+    # (our file is X) and unit_matching/{fname_x}/{bin_filename} (our file is Y)
+    candidate_pairs = []
+    own_x_dir = os.path.join(unit_matching_dir, bin_filename)
+    if os.path.isdir(own_x_dir):
+        for fname_y in os.listdir(own_x_dir):
+            candidate_pairs.append((bin_filename, fname_y))
+    for fname_x in os.listdir(unit_matching_dir):
+        if fname_x != bin_filename:
+            candidate_pairs.append((fname_x, bin_filename))
+    
+    for fname_x, fname_y in candidate_pairs:
+        mutual_matches_path = os.path.join(unit_matching_dir, fname_x, fname_y, "mutual_matches.json")
+        if not os.path.exists(mutual_matches_path):
             continue
         
-        # Scan all X directories in unit_matching
-        for fname_x in os.listdir(unit_matching_dir):
-            x_dir = os.path.join(unit_matching_dir, fname_x)
-            if not os.path.isdir(x_dir):
-                continue
+        try:
+            with open(mutual_matches_path, "r") as f:
+                matches = json.load(f)
             
-            # Scan all Y directories under this X
-            for fname_y in os.listdir(x_dir):
-                y_dir = os.path.join(x_dir, fname_y)
-                if not os.path.isdir(y_dir):
-                    continue
+            # Check if this unit appears in the matches
+            for match in matches:
+                unit_x = match.get("unit_x")
+                unit_y = match.get("unit_y")
+                overall_score = match.get("overall_score")
                 
-                mutual_matches_path = os.path.join(y_dir, "mutual_matches.json")
-                if not os.path.exists(mutual_matches_path):
+                # Check if our unit matches either side
+                if fname_x == bin_filename and unit_x == unit_id:
+                    # Our unit is X, matched to Y
+                    target_bin, target_unit = fname_y, unit_y
+                elif fname_y == bin_filename and unit_y == unit_id:
+                    # Our unit is Y, matched to X
+                    target_bin, target_unit = fname_x, unit_x
+                else:
                     continue
                 
-                try:
-                    with open(mutual_matches_path, "r") as f:
-                        matches = json.load(f)
-                    
-                    # Check if this focus unit appears in the matches
-                    for match in matches:
-                        unit_x = match.get("unit_x")
-                        unit_y = match.get("unit_y")
-                        overall_score = match.get("overall_score")
-                        
-                        # Check if our focus unit matches either side
-                        if fname_x == bin_filename and unit_x == unit_id:
-                            # Our focus unit is X, matched to Y
-                            mutual_matches.append({
-                                "bin_filename": fname_y,
-                                "unit_id": unit_y,
-                                "overall_score": overall_score
-                            })
-                        elif fname_y == bin_filename and unit_y == unit_id:
-                            # Our focus unit is Y, matched to X
-                            mutual_matches.append({
-                                "bin_filename": fname_x,
-                                "unit_id": unit_x,
-                                "overall_score": overall_score
-                            })
-                
-                except (json.JSONDecodeError, IOError):
-                    # Skip files that can't be read
+                key = (target_bin, target_unit)
+                if key in seen:
                     continue
-        
-        # Remove duplicates (same match might be found from both directions)
-        seen = set()
-        unique_matches = []
-        for match in mutual_matches:
-            key = (match["bin_filename"], match["unit_id"])
-            if key not in seen:
                 seen.add(key)
-                unique_matches.append(match)
+                mutual_matches.append({
+                    "bin_filename": target_bin,
+                    "unit_id": target_unit,
+                    "overall_score": overall_score
+                })
         
-        focus_unit["mutual_matches"] = unique_matches
+        except (json.JSONDecodeError, IOError):
+            # Skip files that can't be read
+            continue
+    
+    return mutual_matches
+
+def _find_mutual_matches(bin_filename, unit_id):
+    """
+    Get the mutual matches for a unit in a file.
+    
+    Uses the precomputed index when available, otherwise falls back to
+    scanning the unit_matching directory.
+    """
+    index = _load_mutual_matches_index()
+    if index is None:
+        return _scan_mutual_matches(bin_filename, unit_id)
+    return list(index.get(bin_filename, {}).get(str(unit_id), []))
+
+def _enrich_focus_unit(focus_unit):
+    """Add mutual match data to a focus unit."""
+    focus_unit["mutual_matches"] = _find_mutual_matches(
+        focus_unit["bin_filename"], focus_unit["unit_id"]
+    )
+
+def get_focus_units_handler():
+    """Get all focus units with mutual match information."""
+    data = _load_focus_units()
     
-    return jsonify(data)
+    # Enrich each focus unit with mutual match data
+    if _load_mutual_matches_index() is not None:
+        # Lookups in the index are cheap
+        for focus_unit in data["focus_units"]:
+            _enrich_focus_unit(focus_unit)
+    else:
+        # Without the index each unit needs a directory scan, which is I/O bound,
+        # so overlap the scans in a thread pool
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(_enrich_focus_unit, data["focus_units"]))
+    
+    return _json_response(data)
 
 def add_focus_units_handler():
     """Add new focus units."""
@@ -274,25 +340,19 @@ def get_coarse_sorting_units_handler(filename):
     
     # Load spike labels to get unique unit IDs
     try:
-        spike_labels = np.load(spike_labels_path)
-        unique_units = np.unique(spike_labels)
-        
-        # Count spikes per unit
-        units_info = []
-        for unit_id in unique_units:
-            num_spikes = np.sum(spike_labels == unit_id)
-            units_info.append({
-                "unit_id": int(unit_id),
-                "num_spikes": int(num_spikes)
-            })
+        spike_labels = np.load(spike_labels_path, mmap_mode="r")
         
-        # Sort by unit_id
-        units_info.sort(key=lambda x: x["unit_id"])
+        # Count spikes per unit in a single pass (already sorted by unit_id)
+        counts = np.bincount(spike_labels.astype(np.intp, copy=False))
+        units_info = [
+            {"unit_id": int(unit_id), "num_spikes": int(counts[unit_id])}
+            for unit_id in np.nonzero(counts)[0]
+        ]
         
         # Calculate current hash
         current_hash = _calculate_spike_labels_hash(filename)
         
-        return jsonify({
+        return _json_response({
             "units": units_info,
             "spike_labels_hash": current_hash
         })
@@ -300,8 +360,98 @@ def get_coarse_sorting_units_handler(filename):
     except Exception as e:
         return jsonify({"error": f"Error reading coarse sorting data: {str(e)}"}), 500
 
+def _load_unit_spike_inds(coarse_sorting_dir, unit_id):
+    """
+    Load the spike indices of one unit from the coarse sorting's unit index,
+    or None if the index is unavailable.
+    
+    The index is ignored if it is older than spike_labels.npy. Only the
+    requested member of the npz archive is read.
+    """
+    unit_index_path = os.path.join(coarse_sorting_dir, "unit_index.npz")
+    spike_labels_path = os.path.join(coarse_sorting_dir, "spike_labels.npy")
+    try:
+        index_mtime_ns = os.stat(unit_index_path).st_mtime_ns
+        labels_mtime_ns = os.stat(spike_labels_path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    if index_mtime_ns < labels_mtime_ns:
+        return None
+    key = str(unit_id)
+    with np.load(unit_index_path) as unit_index:
+        if key not in unit_index.files:
+            return np.array([], dtype=np.int32)
+        return unit_index[key]
+
+def _load_unit_spike_times(coarse_sorting_dir, unit_id):
+    """
+    Load the spike times of one unit from a coarse sorting, as float32 seconds
+    relative to the file start.
+    
+    Returns None if the coarse sorting is not available or cannot be read.
+    This runs while the spike train response is being streamed, when an
+    error can no longer be reported through the status code.
+    """
+    spike_times_path = os.path.join(coarse_sorting_dir, "spike_times.npy")
+    spike_labels_path = os.path.join(coarse_sorting_dir, "spike_labels.npy")
+    
+    if not (os.path.exists(spike_times_path) and os.path.exists(spike_labels_path)):
+        return None
+    
+    try:
+        # Memory-map so that only the pages needed for this unit are read
+        spike_times = np.load(spike_times_path, mmap_mode="r")
+        
+        # Filter spike times for this unit
+        unit_spike_inds = _load_unit_spike_inds(coarse_sorting_dir, unit_id)
+        if unit_spike_inds is not None:
+            unit_spike_times = np.asarray(spike_times[unit_spike_inds])
+        else:
+            spike_labels = np.load(spike_labels_path, mmap_mode="r")
+            unit_mask = spike_labels == unit_id
+            unit_spike_times = np.asarray(spike_times[unit_mask])
+    except Exception as e:
+        print(f"Warning: could not read coarse sorting in {coarse_sorting_dir}: {e}")
+        return None
+    
+    # Spike times are float32 seconds; older files may have been saved as float64
+    return unit_spike_times.astype(np.float32, copy=False)
+
+def _num_spike_count_bins(duration_sec, bin_width_sec):
+    """Number of bins of width bin_width_sec needed to cover a segment."""
+    return max(1, int(np.ceil(duration_sec / bin_width_sec)))
+
+def _encode_binned_spike_counts(spike_times, duration_sec, bin_width_sec):
+    """
+    Bin spike times (relative to the segment start) and encode the counts.
+    
+    Returns the counts as base64-encoded little-endian uint16 values.
+    """
+    num_bins = _num_spike_count_bins(duration_sec, bin_width_sec)
+    bin_inds = (spike_times / bin_width_sec).astype(np.int64)
+    # Spikes exactly at the end of the segment go into the last bin
+    bin_inds = np.clip(bin_inds, 0, num_bins - 1)
+    counts = np.bincount(bin_inds, minlength=num_bins)
+    counts = np.minimum(counts, np.iinfo(np.uint16).max).astype("<u2")
+    return base64.b64encode(counts.tobytes()).decode("ascii")
+
 def get_spike_train_for_focus_unit_handler(focus_unit_id):
-    """Get spike train data for a focus unit across all matched files."""
+    """
+    Get spike train data for a focus unit across all matched files.
+    
+    By default each segment contains all spike times. If the bin_width_sec
+    query parameter is positive, each segment instead contains spike counts
+    in bins of that width, starting at the segment start, as base64-encoded
+    little-endian uint16 values (saturating at 65535).
+    """
+    # Parse explicitly: request.args.get(type=float) would silently fall back to the default
+    try:
+        bin_width_sec = float(request.args.get("bin_width_sec", "0"))
+    except ValueError:
+        bin_width_sec = None
+    if bin_width_sec is None or not np.isfinite(bin_width_sec) or bin_width_sec < 0:
+        return jsonify({"error": "bin_width_sec must be a finite non-negative number"}), 400
+    
     # Load focus units
     data = _load_focus_units()
     
@@ -320,8 +470,7 @@ def get_spike_train_for_focus_unit_handler(focus_unit_id):
     if not os.path.exists(config_path):
         return jsonify({"error": "Configuration file not found"}), 404
     
-    with open(config_path, "r") as f:
-        config = yaml.safe_load(f)
+    config = _load_config(config_path)
     
     n_channels = config.get("n_channels", 512)
     sampling_frequency = config.get("sampling_frequency", 20000)
@@ -335,111 +484,102 @@ def get_spike_train_for_focus_unit_handler(focus_unit_id):
     
     bin_files = sorted([fname for fname in os.listdir(raw_dir) if fname.endswith(".bin")])
     
-    # Build mutual matches lookup by scanning unit_matching directory
+    # Build mutual matches lookup
     mutual_matches_map = {}
-    unit_matching_dir = os.path.join(computed_dir, "unit_matching")
-    focus_bin_filename = focus_unit["bin_filename"]
-    focus_unit_id_num = focus_unit["unit_id"]
-    
-    if os.path.exists(unit_matching_dir):
-        # Check all X directories
-        for fname_x in os.listdir(unit_matching_dir):
-            x_dir = os.path.join(unit_matching_dir, fname_x)
-            if not os.path.isdir(x_dir):
-                continue
-            
-            # Check all Y directories under this X
-            for fname_y in os.listdir(x_dir):
-                y_dir = os.path.join(x_dir, fname_y)
-                if not os.path.isdir(y_dir):
-                    continue
-                
-                mutual_matches_path = os.path.join(y_dir, "mutual_matches.json")
-                if not os.path.exists(mutual_matches_path):
-                    continue
-                
-                try:
-                    with open(mutual_matches_path, "r") as f:
-                        matches = json.load(f)
-                    
-                    # Check if this focus unit appears in the matches
-                    for match in matches:
-                        unit_x = match.get("unit_x")
-                        unit_y = match.get("unit_y")
-                        
-                        # Check if our focus unit matches either side
-                        if fname_x == focus_bin_filename and unit_x == focus_unit_id_num:
-                            # Our focus unit is X, matched to Y
-                            mutual_matches_map[fname_y] = unit_y
-                        elif fname_y == focus_bin_filename and unit_y == focus_unit_id_num:
-                            # Our focus unit is Y, matched to X
-                            mutual_matches_map[fname_x] = unit_x
-                
-                except (json.JSONDecodeError, IOError):
-                    # Skip files that can't be read
-                    continue
-    
-    # Build segments with spike times
-    segments = []
-    current_offset = 0.0
-    total_spikes = 0
+    for match in _find_mutual_matches(focus_unit["bin_filename"], focus_unit["unit_id"]):
+        mutual_matches_map[match["bin_filename"]] = match["unit_id"]
     
+    # Calculate file durations up front (a single stat gives both existence and size)
+    # so that an oversized binned response can be rejected before streaming starts
+    file_durations = []
     for bin_filename in bin_files:
-        # Calculate file duration
-        raw_path = os.path.join(raw_dir, bin_filename)
-        if not os.path.exists(raw_path):
+        try:
+            file_size = os.stat(os.path.join(raw_dir, bin_filename)).st_size
+        except FileNotFoundError:
             continue
-        
-        file_size = os.path.getsize(raw_path)
         num_frames = file_size // (2 * n_channels)
-        duration_sec = num_frames / sampling_frequency
-        
-        segment_start = current_offset
-        segment_end = current_offset + duration_sec
+        file_durations.append((bin_filename, num_frames / sampling_frequency))
+    
+    if bin_width_sec > 0:
+        # Only segments with a matching unit are binned; gaps have no counts
+        total_bins = sum(
+            _num_spike_count_bins(duration_sec, bin_width_sec)
+            for bin_filename, duration_sec in file_durations
+            if bin_filename == focus_unit["bin_filename"] or bin_filename in mutual_matches_map
+        )
+        if total_bins > MAX_SPIKE_COUNT_BINS:
+            return jsonify({
+                "error": f"bin_width_sec is too small: {total_bins} bins requested, at most {MAX_SPIKE_COUNT_BINS} allowed"
+            }), 400
+    
+    # Stream the response, encoding each segment as soon as it is built so that
+    # its spike times can be freed before the next file is loaded
+    def generate_response():
+        current_offset = 0.0
+        total_spikes = 0
+        num_segments = 0
         
-        # Check if this file has a matching unit
-        is_focus_file = (bin_filename == focus_unit["bin_filename"])
-        has_match = bin_filename in mutual_matches_map
+        yield (
+            b'{"focus_unit_id":' + orjson.dumps(focus_unit_id)
+            + b',"bin_width_sec":' + orjson.dumps(bin_width_sec) + b',"segments":['
+        )
         
-        if is_focus_file or has_match:
-            # Determine which unit to use
-            if is_focus_file:
-                unit_id = focus_unit["unit_id"]
-            else:
-                unit_id = mutual_matches_map[bin_filename]
+        for bin_filename, duration_sec in file_durations:
+            segment_start = current_offset
+            segment_end = current_offset + duration_sec
             
-            # Load spike times for this unit
-            coarse_sorting_dir = os.path.join(computed_dir, "coarse_sorting", bin_filename)
-            spike_times_path = os.path.join(coarse_sorting_dir, "spike_times.npy")
-            spike_labels_path = os.path.join(coarse_sorting_dir, "spike_labels.npy")
+            # Check if this file has a matching unit
+            is_focus_file = (bin_filename == focus_unit["bin_filename"])
+            has_match = bin_filename in mutual_matches_map
             
-            if os.path.exists(spike_times_path) and os.path.exists(spike_labels_path):
-                spike_times = np.load(spike_times_path)
-                spike_labels = np.load(spike_labels_path)
-                
-                # Filter spike times for this unit
-                unit_mask = spike_labels == unit_id
-                unit_spike_times = spike_times[unit_mask]
+            if is_focus_file or has_match:
+                # Determine which unit to use
+                if is_focus_file:
+                    unit_id = focus_unit["unit_id"]
+                else:
+                    unit_id = mutual_matches_map[bin_filename]
                 
-                # Apply offset to spike times
-                offset_spike_times = unit_spike_times + current_offset
+                # Load spike times for this unit
+                coarse_sorting_dir = os.path.join(computed_dir, "coarse_sorting", bin_filename)
+                unit_spike_times = _load_unit_spike_times(coarse_sorting_dir, unit_id)
                 
-                num_spikes = len(unit_spike_times)
-                total_spikes += num_spikes
-                
-                segments.append({
-                    "bin_filename": bin_filename,
-                    "unit_id": int(unit_id),
-                    "start_time_offset": segment_start,
-                    "end_time_offset": segment_end,
-                    "num_spikes": num_spikes,
-                    "spike_times": offset_spike_times.tolist(),
-                    "is_focus_unit": is_focus_file,
-                    "is_gap": False
-                })
+                if unit_spike_times is not None:
+                    # Apply offset to spike times
+                    offset_spike_times = unit_spike_times + np.float32(current_offset)
+                    
+                    num_spikes = len(unit_spike_times)
+                    total_spikes += num_spikes
+                    
+                    segment = {
+                        "bin_filename": bin_filename,
+                        "unit_id": int(unit_id),
+                        "start_time_offset": segment_start,
+                        "end_time_offset": segment_end,
+                        "num_spikes": num_spikes,
+                        "spike_times": offset_spike_times,
+                        "is_focus_unit": is_focus_file,
+                        "is_gap": False
+                    }
+                    if bin_width_sec > 0:
+                        del segment["spike_times"]
+                        segment["spike_counts"] = _encode_binned_spike_counts(
+                            unit_spike_times, duration_sec, bin_width_sec
+                        )
+                else:
+                    # Coarse sorting not available (or unreadable) for this file - treat as gap
+                    segment = {
+                        "bin_filename": bin_filename,
+                        "unit_id": None,
+                        "start_time_offset": segment_start,
+                        "end_time_offset": segment_end,
+                        "num_spikes": 0,
+                        "spike_times": [],
+                        "is_focus_unit": False,
+                        "is_gap": True
+                    }
             else:
-                # Coarse sorting not available for this file - treat as gap
-                segments.append({
+                # No match for this file - gap
+                segment = {
                     "bin_filename": bin_filename,
                     "unit_id": None,
                     "start_time_offset": segment_start,
@@ -448,27 +588,25 @@ def get_spike_train_for_focus_unit_handler(focus_unit_id):
                     "spike_times": [],
                     "is_focus_unit": False,
                     "is_gap": True
-                })
-        else:
-            # No match for this file - gap
-            segments.append({
-                "bin_filename": bin_filename,
-                "unit_id": None,
-                "start_time_offset": segment_start,
-                "end_time_offset": segment_end,
-                "num_spikes": 0,
-                "spike_times": [],
-                "is_focus_unit": False,
-                "is_gap": True
-            })
+                }
+            
+            if bin_width_sec > 0 and segment["is_gap"]:
+                del segment["spike_times"]
+                segment["spike_counts"] = None
+            
+            # orjson serializes the spike time arrays directly, without converting to lists
+            if num_segments > 0:
+                yield b","
+            yield orjson.dumps(segment, option=orjson.OPT_SERIALIZE_NUMPY)
+            num_segments += 1
+            
+            current_offset = segment_end
         
-        current_offset = segment_end
-    
-    total_duration_sec = current_offset
+        total_duration_sec = current_offset
+        
+        yield (
+            b'],"total_spikes":' + orjson.dumps(total_spikes)
+            + b',"total_duration_sec":' + orjson.dumps(total_duration_sec) + b'}'
+        )
     
-    return jsonify({
-        "focus_unit_id": focus_unit_id,
-        "total_spikes": total_spikes,
-        "total_duration_sec": total_duration_sec,
-        "segments": segments
-    })
+    return Response(generate_response(), mimetype="application/json")
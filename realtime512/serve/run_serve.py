@@ -59,7 +59,7 @@ def run_serve(host="0.0.0.0", port=5000):
     print("  PUT /api/focus_units/<focus_unit_id> - Update focus unit notes")
     print("  DELETE /api/focus_units/<focus_unit_id> - Delete focus unit")
     print("  GET /api/coarse_sorting_units/<filename> - Get available units from coarse sorting")
-    print("  GET /api/focus_units/<focus_unit_id>/spike_train - Get spike train for focus unit")
+    print("  GET /api/focus_units/<focus_unit_id>/spike_train?bin_width_sec=X - Get spike train for focus unit (binned counts if X > 0)")
     print("")
     
     # Create Flask app
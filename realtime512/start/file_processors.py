@@ -7,10 +7,10 @@ from ..helpers.bandpass_filter import apply_bandpass_filter
 from ..helpers.time_shifts import optimize_time_shift, apply_time_shifts
 from ..helpers.high_activity_intervals import detect_high_activity_intervals
 from ..helpers.channel_spike_stats import compute_channel_spike_stats, detect_spikes_single_channel
-from ..helpers.data_utils import set_high_activity_to_zero
+from ..helpers.data_utils import set_high_activity_to_zero, compute_label_index
 from ..helpers.generate_preview import generate_preview
 from ..helpers.coarse_sorting import compute_coarse_sorting
-from ..helpers.unit_matching import compute_unit_matches, calculate_spike_labels_hash
+from ..helpers.unit_matching import compute_unit_matches, calculate_spike_labels_hash, write_mutual_matches_index, update_mutual_matches_index
 
 def process_filtering(bin_files, raw_dir, computed_dir, n_channels, filter_params, sampling_frequency):
     """Apply bandpass filtering to raw .bin files."""
@@ -187,6 +187,12 @@ def process_time_shifts(bin_files, computed_dir, n_channels, sampling_frequency,
             return True
     return False
 
+def save_unit_index(unit_index_path, spike_labels):
+    """Save the spike indices of each unit to an .npz file, keyed by unit ID."""
+    label_index = compute_label_index(spike_labels)
+    # int32 indices take half the space of int64 and cover any realistic number of spikes
+    np.savez(unit_index_path, **{str(unit_id): inds.astype(np.int32) for unit_id, inds in label_index.items()})
+
 def process_coarse_sorting(bin_files, computed_dir, n_channels, sampling_frequency, electrode_coords, coarse_sorting_detect_threshold):
     """Perform coarse spike sorting on shifted data."""
     for fname in bin_files:
@@ -205,9 +211,13 @@ def process_coarse_sorting(bin_files, computed_dir, n_channels, sampling_frequen
         spike_times_path = os.path.join(coarse_sorting_dir, "spike_times.npy")
         spike_labels_path = os.path.join(coarse_sorting_dir, "spike_labels.npy")
         spike_amplitudes_path = os.path.join(coarse_sorting_dir, "spike_amplitudes.npy")
+        unit_index_path = os.path.join(coarse_sorting_dir, "unit_index.npz")
         
         if (os.path.exists(templates_path) and os.path.exists(spike_times_path) and 
             os.path.exists(spike_labels_path) and os.path.exists(spike_amplitudes_path)):
+            if not os.path.exists(unit_index_path):
+                # Coarse sorting from before the unit index was introduced
+                save_unit_index(unit_index_path, np.load(spike_labels_path))
             continue  # Already processed
         
         if not os.path.exists(shift_path):
@@ -240,6 +250,7 @@ def process_coarse_sorting(bin_files, computed_dir, n_channels, sampling_frequen
         np.save(spike_times_path, spike_times)
         np.save(spike_labels_path, spike_labels)
         np.save(spike_amplitudes_path, spike_amplitudes)
+        save_unit_index(unit_index_path, spike_labels)
         
         print(f"  Saved {len(spike_times)} spikes with {len(templates)} templates")
         return True
@@ -271,6 +282,8 @@ def process_unit_matching(bin_files, computed_dir, n_channels, sampling_frequenc
     y_filenames = list(set(unit["bin_filename"] for unit in focus_units))
     
     something_processed = False
+    unit_matching_root = os.path.join(computed_dir, "unit_matching")
+    index_path = os.path.join(unit_matching_root, "index.json")
     
     # Process each file X
     for fname_x in bin_files:
@@ -339,6 +352,7 @@ def process_unit_matching(bin_files, computed_dir, n_channels, sampling_frequenc
                     if os.path.exists(event_matches_y_to_x_path):
                         os.remove(event_matches_y_to_x_path)
                     os.remove(metadata_path)
+                    update_mutual_matches_index(unit_matching_root, fname_x, fname_y)
                     need_recompute = True
                 else:
                     # Hashes match, check if all files exist
@@ -381,7 +395,8 @@ def process_unit_matching(bin_files, computed_dir, n_channels, sampling_frequenc
                 labels_x=spike_labels_x,
                 frames_y=frames_y,
                 labels_y=spike_labels_y,
-                n_neighbors=10
+                n_neighbors=10,
+                knn_cache_dir=os.path.join(computed_dir, "knn_cache")
             )
             
             # Save results
@@ -402,9 +417,16 @@ def process_unit_matching(bin_files, computed_dir, n_channels, sampling_frequenc
             with open(metadata_path, "w") as f:
                 json.dump(metadata, f, indent=2)
             
+            # Keep the mutual matches index used by the server up to date
+            update_mutual_matches_index(unit_matching_root, fname_x, fname_y)
+            
             print(f"  Found {len(match_results['mutual_matches'])} mutual matches")
             something_processed = True
     
+    # Create the index for match results computed before the index existed
+    if os.path.exists(unit_matching_root) and not os.path.exists(index_path):
+        write_mutual_matches_index(unit_matching_root)
+    
     return something_processed
 
 def process_preview(bin_files, computed_dir, n_channels, sampling_frequency, electrode_coords):